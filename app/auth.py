@@ -1,33 +1,99 @@
-from passlib.context import CryptContext
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+import bcrypt
 from fastapi.security import OAuth2PasswordBearer
-from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from cachetools import TLRUCache, TTLCache
+import asyncio
+import hashlib
+import time
 import jwt
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, lambda_stmt
 
 from app.models.users import User as UserModel
-from app.config import SECRET_KEY, ALGORITHM
 from app.depends import get_async_db
+from app import jwt_backend
+from app.config import PASSWORD_HASH_WORKERS
 
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto"
-)
+# Argon2id is used for new hashes, bcrypt hashes are still accepted and
+# upgraded on the next successful login. time_cost and memory_cost (KiB)
+# are the cost knobs: raising them makes hashing slower and harder to brute force.
+_argon2 = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+
+# Prefixes of the bcrypt hashes stored before the switch to argon2
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# Password hashing is CPU bound, so it runs in a dedicated pool
+# instead of blocking the event loop or the default executor
+_password_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password")
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
+_ACCESS_EXP_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_REFRESH_EXP_SECONDS = REFRESH_TOKEN_EXPIRE_DAYS * 86400
+USER_CACHE_TTL_SECONDS = 30
+# Refresh tokens live for days but are replayed within minutes, if at all
+REFRESH_TOKEN_CACHE_TTL_SECONDS = 5 * 60
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+# Authentication errors are built once and re-raised with a fresh traceback
+CREDENTIALS_EXC = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+TOKEN_EXPIRED_EXC = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Token has expired",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+BAD_CREDENTIALS_EXC = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Incorrect email or password",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+def _token_expiration(ttl: int):
+    """
+    Builds a cache expiration function bounded by the token `exp` claim
+    """
+
+    def ttu(_key, payload: dict, now: float) -> float:
+        exp = payload.get("exp")
+        return now + ttl if exp is None else min(exp, now + ttl)
+
+    return ttu
+
+
+# Payloads of already verified tokens keyed by token digest.
+# Entries never outlive the token itself, invalid tokens are never stored.
+_access_token_cache = TLRUCache(
+    maxsize=10_000,
+    ttu=_token_expiration(_ACCESS_EXP_SECONDS),
+    timer=time.time,
+)
+_refresh_token_cache = TLRUCache(
+    maxsize=50_000,
+    ttu=_token_expiration(REFRESH_TOKEN_CACHE_TTL_SECONDS),
+    timer=time.time,
+)
+
+# Active users keyed by email
+_user_cache = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL_SECONDS)
+
 
 def hash_password(password: str) -> str:
     """
-    Hashes a plain password using bcrypt
+    Hashes a plain password using argon2
     """
 
-    return pwd_context.hash(password)
+    return _argon2.hash(password)
 
 
 def verify_password(
@@ -38,86 +104,221 @@ def verify_password(
     Verifies a plain password against its hashed version
     """
 
-    return pwd_context.verify(plain_password, hashed_password)
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+    try:
+        return _argon2.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+async def ahash_password(password: str) -> str:
+    """
+    Hashes a plain password without blocking the event loop
+    """
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, hash_password, password)
 
 
-def create_access_token(data: dict) -> str:
+async def averify_password(
+        plain_password: str,
+        hashed_password: str
+) -> bool:
     """
-    Creates a JWT access token with expiration time
+    Verifies a plain password without blocking the event loop
     """
 
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({
-        "exp": expire,
-        "token_type": "access",
-    })
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_pool, verify_password, plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Checks if a hashed password uses a deprecated scheme or outdated cost settings
+    """
+
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return True
+    return _argon2.check_needs_rehash(hashed_password)
 
 
 def create_refresh_token(data: dict) -> str:
     """
     Creates a JWT refresh token with expiration time
     """
-    to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({
-        "exp": expire,
-        "token_type": "refresh",
-    })
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    expire = int(time.time()) + _REFRESH_EXP_SECONDS
+    to_encode = {**data, "exp": expire, "token_type": "refresh"}
+    return jwt_backend.encode(to_encode)
 
 
-async def get_current_user(
-        token: str = Depends(oauth2_scheme),
-        db: AsyncSession = Depends(get_async_db)
-) -> UserModel:
+def create_token_pair(data: dict) -> tuple[str, str]:
     """
-    Retrieves the current authenticated user based on JWT token
+    Creates an access and a refresh token for the same claims
+    """
+
+    # exp is a NumericDate, so plain epoch seconds are enough
+    now = int(time.time())
+    access_token = jwt_backend.encode({**data, "exp": now + _ACCESS_EXP_SECONDS, "token_type": "access"})
+    refresh_token = jwt_backend.encode({**data, "exp": now + _REFRESH_EXP_SECONDS, "token_type": "refresh"})
+    return access_token, refresh_token
+
+
+def _decode_token(token: str, cache: TLRUCache) -> dict:
+    """
+    Decodes a JWT token, skipping signature verification for recently verified tokens
+    """
+
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = cache.get(key)
+    if payload is None:
+        payload = jwt_backend.decode(token)
+        cache[key] = payload
+    return payload
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decodes and validates a JWT access token
+    """
+
+    return _decode_token(token, _access_token_cache)
+
+
+def decode_refresh_token(token: str) -> dict:
+    """
+    Decodes and validates a JWT refresh token
+    """
+
+    return _decode_token(token, _refresh_token_cache)
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """
+    Columns of an authenticated user needed by the API
+    """
+    id: int
+    email: str
+    username: str
+    role: str
+    is_active: bool
+    hashed_password: str
+
+
+@dataclass(frozen=True, slots=True)
+class TokenUser:
+    """
+    Identity of the caller as signed into the access token
+    """
+    id: int
+    email: str
+    role: str
+
+
+async def load_user_by_email(db: AsyncSession, email: str) -> CurrentUser | None:
+    """
+    Returns an active user by email, reusing recently loaded rows
+    """
+
+    user = _user_cache.get(email)
+    if user is None:
+        # Select plain columns to skip ORM instance and identity map overhead.
+        # lambda_stmt builds the statement once, later calls only bind `email`.
+        row = (await db.execute(lambda_stmt(
+            lambda: select(
+                UserModel.id,
+                UserModel.email,
+                UserModel.username,
+                UserModel.role,
+                UserModel.is_active,
+                UserModel.hashed_password,
+            ).where(UserModel.email == email, UserModel.is_active == True)
+        ))).first()
+        if row is None:
+            return None
+
+        user = CurrentUser(*row)
+        _user_cache[email] = user
+
+    return user
+
+
+def invalidate_user_cache(email: str) -> None:
+    """
+    Drops the cached row of a user that was changed or deleted
+    """
+
+    _user_cache.pop(email, None)
+
+
+def _access_token_claims(token: str) -> dict:
+    """
+    Decodes an access token, mapping JWT errors to 401 responses
     """
 
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
     try:
         # Decode JWT token and validate signature
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-
-        # Extract user identifier from token payload
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
+        payload = decode_access_token(token)
 
     # When token is valid but expired
     except jwt.ExpiredSignatureError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token has expired",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise TOKEN_EXPIRED_EXC.with_traceback(None) from None
 
     except jwt.PyJWTError:
-        raise credentials_exception
+        raise CREDENTIALS_EXC.with_traceback(None) from None
+
+    # A refresh token lives for days, it must not pass as an access token
+    if payload.get("token_type") != "access":
+        raise CREDENTIALS_EXC.with_traceback(None)
+
+    # Extract user identifier from token payload
+    if payload.get("sub") is None:
+        raise CREDENTIALS_EXC.with_traceback(None)
+
+    return payload
+
+
+async def get_current_user(
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
+    """
+    Retrieves the current authenticated user based on JWT token
+    """
 
-    result = await db.scalars(
-        select(UserModel).where(UserModel.email == email, UserModel.is_active == True))
-    user = result.first()
+    payload = _access_token_claims(token)
+    user = await load_user_by_email(db, payload["sub"])
 
     if user is None:
-        raise credentials_exception
+        raise CREDENTIALS_EXC.with_traceback(None)
 
     return user
 
 
-def get_current_admin(current_user: UserModel = Depends(get_current_user)):
+async def get_token_user(token: str = Depends(oauth2_scheme)) -> TokenUser:
+    """
+    Retrieves the caller from the access token claims without a database lookup
+    """
+
+    payload = _access_token_claims(token)
+    try:
+        return TokenUser(id=payload["id"], email=payload["sub"], role=payload["role"])
+    except KeyError:
+        raise CREDENTIALS_EXC.with_traceback(None) from None
+
+
+async def get_current_admin(current_user: TokenUser = Depends(get_token_user)) -> TokenUser:
     """
-    Retrieves the current admin user
+    Retrieves the current admin user.
+
+    The role comes from the access token, so a demoted, deactivated or deleted
+    admin keeps access until it expires, at most ACCESS_TOKEN_EXPIRE_MINUTES.
     """
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only admins can perform this action")
 
-    return current_user
\ No newline at end of file
+    return current_user
@@ -4,4 +4,10 @@ from dotenv import load_dotenv
 
 load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = "HS256"
\ No newline at end of file
+ALGORITHM = "HS256"
+# JWT implementation used for signing and verification: "pyjwt" or "hmac"
+JWT_BACKEND = os.getenv("JWT_BACKEND", "pyjwt")
+# Optional Redis cache for Open Library responses, e.g. redis://redis:6379/0
+REDIS_URL = os.getenv("REDIS_URL")
+# Threads hashing and verifying passwords, argon2 releases the GIL so one per core is enough
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
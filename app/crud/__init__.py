@@ -0,0 +1,43 @@
+# Shared database write helpers
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any, TypeVar
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import Base
+
+
+ModelT = TypeVar("ModelT", bound=Base)
+
+
+async def upsert_ignore(
+        db: AsyncSession,
+        model: type[ModelT],
+        values: Mapping[str, Any] | Sequence[Mapping[str, Any]],
+        conflict_cols: Iterable[str],
+) -> list[ModelT]:
+    """
+    Inserts one or more rows with INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Use it instead of SELECT-then-INSERT for tables with a user-scoped unique
+    constraint (reviews, favorites, user_books, books_in_shelf). It takes one
+    round trip and avoids the race between the check and the insert.
+
+    - `conflict_cols` must match the columns of a unique constraint or index
+    - A list of values is sent as a single multi-row INSERT
+    - Returns only the rows that were inserted, conflicting rows are skipped
+    - Doesn't commit, the caller owns the transaction
+    """
+
+    rows = [values] if isinstance(values, Mapping) else list(values)
+    if not rows:
+        return []
+
+    result = await db.scalars(
+        pg_insert(model)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=list(conflict_cols))
+        .returning(model)
+    )
+    return list(result.all())
@@ -1,3 +1,5 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
 from dotenv import load_dotenv
@@ -11,7 +13,33 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set")
 
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+if make_url(DATABASE_URL).drivername != "postgresql+asyncpg":
+    raise ValueError("DATABASE_URL must use the postgresql+asyncpg:// driver")
+
+# Behind PgBouncer in transaction mode set DB_NULL_POOL=1 and let PgBouncer do the pooling
+if os.getenv("DB_NULL_POOL") == "1":
+    pool_options = {"poolclass": NullPool}
+else:
+    pool_options = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 20)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        "pool_timeout": int(os.getenv("DB_POOL_TIMEOUT", 30)),
+        "pool_pre_ping": True,
+        "pool_recycle": 1800,
+    }
+
+async_engine = create_async_engine(
+    DATABASE_URL,
+    # Statement logging is opt-in, set SQL_ECHO=1 to enable it
+    echo=os.getenv("SQL_ECHO") == "1",
+    connect_args={
+        # JIT compilation only slows down the short OLTP queries this API runs
+        "server_settings": {"jit": "off"},
+        # Seconds before a hanging statement is cancelled and its connection freed
+        "command_timeout": int(os.getenv("DB_COMMAND_TIMEOUT", 60)),
+    },
+    **pool_options,
+)
 
 async_session_maker = async_sessionmaker(async_engine, expire_on_commit=False, class_=AsyncSession)
 
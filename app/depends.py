@@ -1,6 +1,9 @@
 from collections.abc import AsyncGenerator
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import async_session_maker
+from app.models.books import Book as BookModel
+from app.services.page_cache import PageCache
 
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
@@ -8,3 +11,19 @@ async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """
     async with async_session_maker() as session:
         yield session
+
+
+async def get_page_cache(request: Request) -> PageCache:
+    """
+    Redis cache of rendered per-user list pages
+    """
+    return request.app.state.page_cache
+
+
+async def get_book_cache(request: Request) -> dict[str, BookModel]:
+    """
+    Books loaded during the current request, keyed by work OLID
+    """
+    if not hasattr(request.state, "book_cache"):
+        request.state.book_cache = {}
+    return request.state.book_cache
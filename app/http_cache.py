@@ -0,0 +1,28 @@
+import hashlib
+
+from fastapi import Request
+
+
+# Clients may reuse a response for a few seconds, then have to revalidate it with its ETag
+PRIVATE_CACHE_CONTROL = "private, max-age=5"
+
+
+def weak_etag(*parts) -> str:
+    """
+    Weak ETag built from values that change whenever the response does
+    """
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the If-None-Match header of the request lists the ETag (weak comparison)
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
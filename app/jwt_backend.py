@@ -0,0 +1,174 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from calendar import timegm
+from datetime import datetime
+from functools import cached_property
+
+import jwt
+import orjson
+
+from app.config import SECRET_KEY, ALGORITHM, JWT_BACKEND
+
+
+# Claims every token issued by the API must carry
+REQUIRED_CLAIMS = ("exp", "sub")
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _json_default(value):
+    # Same NumericDate conversion PyJWT applies to datetime claims
+    if isinstance(value, datetime):
+        return timegm(value.utctimetuple())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# The header of every HS256 token is the same, so it is encoded once
+_HEADER_B64 = _b64encode(b'{"alg":"HS256","typ":"JWT"}')
+
+
+def _key_bytes(key: str | None) -> bytes:
+    # Checked on first use, so modules that only hash passwords import without a key
+    if not key:
+        raise ValueError("SECRET_KEY is not set")
+    return key.encode()
+
+
+def _hs256_mac(key: str | None) -> hmac.HMAC:
+    # Keyed HMAC state, copying it skips hashing the padded key for every token
+    return hmac.new(_key_bytes(key), digestmod=hashlib.sha256)
+
+
+def _hs256_digest(mac: hmac.HMAC, signing_input: str) -> bytes:
+    mac = mac.copy()
+    mac.update(signing_input.encode())
+    return mac.digest()
+
+
+def _sign_hs256(payload: dict, mac: hmac.HMAC) -> str:
+    """
+    Builds a signed HS256 token from the precomputed header and the payload
+    """
+
+    payload_json = orjson.dumps(payload, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    signing_input = f"{_HEADER_B64}.{_b64encode(payload_json)}"
+    return f"{signing_input}.{_b64encode(_hs256_digest(mac, signing_input))}"
+
+
+class PyJWTBackend:
+    """
+    Decodes JWT tokens with PyJWT.
+
+    HS256 tokens are signed on the precomputed-header fast path,
+    other algorithms are encoded by PyJWT as well.
+    """
+
+    def __init__(self, key: str, algorithm: str):
+        self._jwt = jwt.PyJWT()
+        self._key = key
+        self._algorithm = algorithm
+        self._algorithms = (algorithm,)
+        self._options = {
+            "verify_signature": True,
+            "verify_exp": True,
+            "require": list(REQUIRED_CLAIMS),
+        }
+
+    @cached_property
+    def _hs256_mac(self) -> hmac.HMAC | None:
+        return _hs256_mac(self._key) if self._algorithm == "HS256" else None
+
+    @cached_property
+    def _decode_key(self):
+        # PyJWT prepares a str key again on every decode, an HMAC key wrapped in a PyJWK is used as is
+        if self._algorithm.startswith("HS"):
+            return jwt.PyJWK({"kty": "oct", "k": _b64encode(_key_bytes(self._key))}, self._algorithm)
+        return self._key
+
+    def encode(self, payload: dict) -> str:
+        if self._hs256_mac is not None:
+            return _sign_hs256(payload, self._hs256_mac)
+        return self._jwt.encode(payload, self._key, algorithm=self._algorithm)
+
+    def decode(self, token: str) -> dict:
+        return self._jwt.decode(token, self._decode_key, algorithms=self._algorithms, options=self._options)
+
+
+class HMACBackend:
+    """
+    Encodes and decodes HS256 tokens directly with the OpenSSL-backed hmac module.
+
+    Raises the same PyJWT exceptions as PyJWTBackend, so callers can switch
+    backends without changing their error handling.
+    """
+
+    def __init__(self, key: str, algorithm: str):
+        if algorithm != "HS256":
+            raise ValueError(f"HMACBackend supports only HS256, got {algorithm}")
+        self._key = key
+
+    @cached_property
+    def _mac(self) -> hmac.HMAC:
+        return _hs256_mac(self._key)
+
+    def encode(self, payload: dict) -> str:
+        return _sign_hs256(payload, self._mac)
+
+    def decode(self, token: str) -> dict:
+        try:
+            signing_input, _, signature_b64 = token.rpartition(".")
+            header_b64, _, payload_b64 = signing_input.partition(".")
+            header = orjson.loads(_b64decode(header_b64))
+            signature = _b64decode(signature_b64)
+        except (ValueError, binascii.Error):
+            raise jwt.DecodeError("Invalid token segments")
+
+        if not isinstance(header, dict) or header.get("alg") != "HS256":
+            raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+
+        expected = _hs256_digest(self._mac, signing_input)
+        if not hmac.compare_digest(signature, expected):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+
+        try:
+            payload = orjson.loads(_b64decode(payload_b64))
+        except (ValueError, binascii.Error):
+            raise jwt.DecodeError("Invalid payload segment")
+
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload segment")
+
+        for claim in REQUIRED_CLAIMS:
+            if claim not in payload:
+                raise jwt.MissingRequiredClaimError(claim)
+
+        exp = payload["exp"]
+        if not isinstance(exp, (int, float)):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be an integer.")
+        if exp <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+
+        return payload
+
+
+_BACKENDS = {
+    "pyjwt": PyJWTBackend,
+    "hmac": HMACBackend,
+}
+
+try:
+    backend = _BACKENDS[JWT_BACKEND](SECRET_KEY, ALGORITHM)
+except KeyError:
+    raise ValueError(f"Unknown JWT_BACKEND: {JWT_BACKEND}")
+
+encode = backend.encode
+decode = backend.decode
@@ -0,0 +1,40 @@
+"""use native enum for reading status
+
+Revision ID: 5e0c7a9d2b41
+Revises: 2c3615164f43
+Create Date: 2026-10-15 10:12:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0c7a9d2b41'
+down_revision: Union[str, Sequence[str], None] = '2c3615164f43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE TYPE reading_status_enum AS ENUM ('PLANNED', 'READING', 'COMPLETED', 'DROPPED')")
+    op.alter_column('user_books', 'status',
+               existing_type=sa.VARCHAR(length=9),
+               type_=sa.Enum('PLANNED', 'READING', 'COMPLETED', 'DROPPED', name='reading_status_enum'),
+               existing_nullable=False,
+               postgresql_using='status::reading_status_enum')
+    op.create_index('ix_user_books_user_id_status', 'user_books', ['user_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_books_user_id_status', table_name='user_books')
+    op.alter_column('user_books', 'status',
+               existing_type=sa.Enum('PLANNED', 'READING', 'COMPLETED', 'DROPPED', name='reading_status_enum'),
+               type_=sa.VARCHAR(length=9),
+               existing_nullable=False,
+               postgresql_using='status::text')
+    op.execute("DROP TYPE reading_status_enum")
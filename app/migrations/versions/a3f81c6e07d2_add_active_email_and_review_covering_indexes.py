@@ -0,0 +1,30 @@
+"""add active email and review covering indexes
+
+Revision ID: a3f81c6e07d2
+Revises: 5e0c7a9d2b41
+Create Date: 2026-10-15 10:31:05.184633
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f81c6e07d2'
+down_revision: Union[str, Sequence[str], None] = '5e0c7a9d2b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_email_active', 'users', ['email'], unique=False, postgresql_where=sa.text('is_active'))
+    op.create_index('ix_reviews_user_work', 'reviews', ['user_id', 'work_olid'], unique=False, postgresql_include=['rating'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_reviews_user_work', table_name='reviews', postgresql_include=['rating'])
+    op.drop_index('ix_users_email_active', table_name='users', postgresql_where=sa.text('is_active'))
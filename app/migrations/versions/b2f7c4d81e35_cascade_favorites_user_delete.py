@@ -0,0 +1,30 @@
+"""cascade favorites user delete
+
+Revision ID: b2f7c4d81e35
+Revises: 9a4c1e7b5d20
+Create Date: 2026-10-15 15:42:08.913527
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2f7c4d81e35'
+down_revision: Union[str, Sequence[str], None] = '9a4c1e7b5d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_constraint('favorites_user_id_fkey', 'favorites', type_='foreignkey')
+    op.create_foreign_key('favorites_user_id_fkey', 'favorites', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('favorites_user_id_fkey', 'favorites', type_='foreignkey')
+    op.create_foreign_key('favorites_user_id_fkey', 'favorites', 'users', ['user_id'], ['id'])
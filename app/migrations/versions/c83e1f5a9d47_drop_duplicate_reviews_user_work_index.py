@@ -0,0 +1,29 @@
+"""drop duplicate reviews user work index
+
+Revision ID: c83e1f5a9d47
+Revises: b2f7c4d81e35
+Create Date: 2026-10-15 17:05:31.402918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c83e1f5a9d47'
+down_revision: Union[str, Sequence[str], None] = 'b2f7c4d81e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same columns as the unique index of uq_user_work_review
+    op.drop_index('ix_reviews_user_work', table_name='reviews', postgresql_include=['rating'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_reviews_user_work', 'reviews', ['user_id', 'work_olid'], unique=False, postgresql_include=['rating'])
@@ -0,0 +1,74 @@
+"""add review stats
+
+Revision ID: e41b8c5a7f93
+Revises: c7d2e94b1f60
+Create Date: 2026-10-15 12:14:05.281634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b8c5a7f93'
+down_revision: Union[str, Sequence[str], None] = 'c7d2e94b1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('review_stats',
+    sa.Column('work_olid', sa.String(length=50), nullable=False),
+    sa.Column('review_count', sa.Integer(), nullable=False),
+    sa.Column('rating_sum', sa.Numeric(), nullable=False),
+    sa.PrimaryKeyConstraint('work_olid')
+    )
+    op.execute(
+        """
+        INSERT INTO review_stats (work_olid, review_count, rating_sum)
+        SELECT work_olid, count(*), sum(rating::numeric)
+        FROM reviews
+        GROUP BY work_olid
+        """
+    )
+    # Reviews are also removed by the users.id ON DELETE CASCADE, so the stats
+    # are kept in a trigger rather than in the review endpoints
+    op.execute(
+        """
+        CREATE FUNCTION reviews_update_stats() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                UPDATE review_stats
+                SET review_count = review_count - 1,
+                    rating_sum = rating_sum - OLD.rating::numeric
+                WHERE work_olid = OLD.work_olid;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO review_stats (work_olid, review_count, rating_sum)
+                VALUES (NEW.work_olid, 1, NEW.rating::numeric)
+                ON CONFLICT (work_olid) DO UPDATE
+                SET review_count = review_stats.review_count + 1,
+                    rating_sum = review_stats.rating_sum + EXCLUDED.rating_sum;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER reviews_update_stats
+        AFTER INSERT OR DELETE OR UPDATE OF rating, work_olid ON reviews
+        FOR EACH ROW EXECUTE FUNCTION reviews_update_stats()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER reviews_update_stats ON reviews")
+    op.execute("DROP FUNCTION reviews_update_stats()")
+    op.drop_table('review_stats')
@@ -0,0 +1,39 @@
+"""store book authors as array
+
+Revision ID: f58a2d0c9e14
+Revises: e41b8c5a7f93
+Create Date: 2026-10-15 12:41:37.904125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f58a2d0c9e14'
+down_revision: Union[str, Sequence[str], None] = 'e41b8c5a7f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('books', 'authors',
+               existing_type=sa.VARCHAR(length=255),
+               type_=postgresql.ARRAY(sa.Text()),
+               existing_nullable=True,
+               postgresql_using="string_to_array(NULLIF(authors, ''), ', ')")
+    op.create_index('ix_books_authors', 'books', ['authors'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_books_authors', table_name='books', postgresql_using='gin')
+    op.alter_column('books', 'authors',
+               existing_type=postgresql.ARRAY(sa.Text()),
+               type_=sa.VARCHAR(length=255),
+               existing_nullable=True,
+               postgresql_using="array_to_string(authors, ', ')")
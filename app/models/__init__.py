@@ -6,5 +6,6 @@ from .bookshelves import BookShelf
 from .books_in_shelf import BookInShelf
 from .user_books import UserBook
 from .books import Book
+from .review_stats import ReviewStats
 
-__all__ = ["Favorite", "User", "Review", "BookShelf", "BookInShelf", "UserBook", "Book"]
\ No newline at end of file
+__all__ = ["Favorite", "User", "Review", "BookShelf", "BookInShelf", "UserBook", "Book", "ReviewStats"]
\ No newline at end of file
@@ -1,4 +1,5 @@
-from sqlalchemy import Integer, String
+from sqlalchemy import Integer, String, Text, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -21,7 +22,7 @@ class Book(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     work_olid: Mapped[str] = mapped_column(String(50), unique=True, nullable=False, index=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
-    authors: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    authors: Mapped[list[str] | None] = mapped_column(ARRAY(Text), nullable=True)
     cover_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
     published_year: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
@@ -30,4 +31,10 @@ class Book(Base):
         "Favorite",
         back_populates="book",
         cascade="all, delete-orphan"
-    )
\ No newline at end of file
+    )
+
+    # Constraints
+    __table_args__ = (
+        # Lets author filters use array operators (@>, &&) without a full scan
+        Index("ix_books_authors", "authors", postgresql_using="gin"),
+    )
@@ -9,6 +9,7 @@ from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from app.models.bookshelves import BookShelf
+    from app.models.books import Book
 
 
 class BookInShelf(Base):
@@ -31,6 +32,13 @@ class BookInShelf(Base):
 
     # Relationship
     bookshelf: Mapped["BookShelf"] = relationship("BookShelf", back_populates="books")
+    # work_olid has no foreign key, books may not be saved locally yet
+    book: Mapped["Book | None"] = relationship(
+        "Book",
+        primaryjoin="foreign(BookInShelf.work_olid) == Book.work_olid",
+        viewonly=True,
+        lazy="raise",
+    )
 
     # Constraints
     __table_args__ = (
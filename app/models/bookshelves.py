@@ -36,7 +36,11 @@ class BookShelf(Base):
     books: Mapped[list["BookInShelf"]] = relationship(
         "BookInShelf",
         back_populates="bookshelf",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        # Rows are removed by ON DELETE CASCADE, the books are never loaded just to delete them
+        passive_deletes=True,
+        # Load explicitly with selectinload where the books are needed
+        lazy="raise"
     )
 
     # Constraints
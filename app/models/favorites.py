@@ -23,7 +23,7 @@ class Favorite(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Foreign key
-    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="favorites")
@@ -31,7 +31,8 @@ class Favorite(Base):
         "Book",
         back_populates="favorites",
         uselist=False,
-        lazy="joined"
+        # Load explicitly with selectinload/joinedload where the book is needed
+        lazy="raise"
     )
 
     __table_args__ = (
@@ -0,0 +1,21 @@
+from sqlalchemy import Integer, String, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+from decimal import Decimal
+
+
+class ReviewStats(Base):
+    """
+    Review count and rating sum of a book.
+
+    Maintained by the `reviews_update_stats` trigger on the reviews table,
+    never written by the application.
+    """
+    __tablename__ = "review_stats"
+
+    # Fields
+    work_olid: Mapped[str] = mapped_column(String(50), primary_key=True)
+    review_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_sum: Mapped[Decimal] = mapped_column(Numeric, nullable=False, default=0)
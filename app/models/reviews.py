@@ -19,7 +19,7 @@ class Review(Base):
 
     # Fields
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    work_olid: Mapped[str] = mapped_column(String(50), nullable=False)
+    work_olid: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     comment: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), onupdate=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, DateTime, Enum, ForeignKey, func, UniqueConstraint, CheckConstraint
+from sqlalchemy import Integer, String, DateTime, Enum, ForeignKey, func, UniqueConstraint, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 import enum
@@ -9,7 +9,7 @@ from app.database import Base
 
 
 if TYPE_CHECKING:
-    from app.models import User
+    from app.models import User, Book
 
 
 class ReadingStatus(str, enum.Enum):
@@ -32,7 +32,7 @@ class UserBook(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     work_olid: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
     status: Mapped[ReadingStatus] = mapped_column(
-        Enum(ReadingStatus, name="reading_status_enum", native_enum=False),
+        Enum(ReadingStatus, name="reading_status_enum"),
         default=ReadingStatus.PLANNED,
         nullable=False
     )
@@ -58,6 +58,16 @@ class UserBook(Base):
 
     # Relationship
     user: Mapped["User"] = relationship("User", back_populates="user_books")
+    # work_olid has no foreign key, books may not be saved locally yet
+    book: Mapped["Book | None"] = relationship(
+        "Book",
+        primaryjoin="foreign(UserBook.work_olid) == Book.work_olid",
+        viewonly=True,
+        lazy="raise",
+    )
+
+    # Server-generated updated_at is fetched with RETURNING instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     # Constraints
     __table_args__ = (
@@ -70,4 +80,7 @@ class UserBook(Base):
             "rating IS NULL OR (rating >= 1 AND rating <= 5)",
             name="check_rating_range",
         ),
+        # Keyset pagination of the reading list, newest first, with and without a status filter
+        Index("ix_user_books_user_created", "user_id", created_at.desc(), id.desc()),
+        Index("ix_user_books_user_status_created", "user_id", "status", created_at.desc(), id.desc()),
     )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Boolean, DateTime, func
+from sqlalchemy import Integer, String, Boolean, DateTime, func, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -28,6 +28,12 @@ class User(Base):
     role: Mapped[str] = mapped_column(String(20), default='user')
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
 
     # relationship
     favorites: Mapped[list["Favorite"]] = relationship(
@@ -41,4 +47,13 @@ class User(Base):
     )
     user_books: Mapped[list["UserBook"]] = relationship(
         "UserBook", back_populates="user", cascade="all, delete-orphan"
-    )
\ No newline at end of file
+    )
+
+    # Server-generated updated_at is fetched with RETURNING instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
+
+    # Indexes
+    __table_args__ = (
+        # Authentication only ever looks up active users
+        Index("ix_users_email_active", "email", postgresql_where=text("is_active")),
+    )
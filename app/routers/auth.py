@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
 import jwt
@@ -7,8 +7,17 @@ import jwt
 from app.models.users import User as UserModel
 from app.schemas.auth import RefreshTokenRequest
 from app.depends import get_async_db
-from app.auth import verify_password, create_access_token, create_refresh_token
-from app.config import SECRET_KEY, ALGORITHM
+from app.auth import (
+    ahash_password,
+    averify_password,
+    password_needs_rehash,
+    create_token_pair,
+    create_refresh_token,
+    decode_refresh_token,
+    load_user_by_email,
+    invalidate_user_cache,
+    BAD_CREDENTIALS_EXC,
+)
 
 
 router = APIRouter(
@@ -16,6 +25,12 @@ router = APIRouter(
     tags=["auth"],
 )
 
+REFRESH_TOKEN_EXC = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate refresh token",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
 
 @router.post("/token", summary="User login",)
 async def login(
@@ -26,30 +41,28 @@ async def login(
     Authenticate user and return JWT access and refresh tokens.
     """
 
-    result = await db.scalars(
-        select(UserModel).where(UserModel.email == form_data.username, UserModel.is_active == True))
-    user = result.first()
+    user = await load_user_by_email(db, form_data.username)
 
-    if not user or not verify_password(form_data.password, str(user.hashed_password)):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect email or password",
-            headers={"WWW-Authenticate": "Bearer"},
+    if not user or not await averify_password(form_data.password, str(user.hashed_password)):
+        raise BAD_CREDENTIALS_EXC.with_traceback(None)
+
+    # Upgrade legacy bcrypt hashes or outdated cost settings
+    if password_needs_rehash(user.hashed_password):
+        await db.execute(
+            update(UserModel)
+            .where(UserModel.id == user.id)
+            .values(hashed_password=await ahash_password(form_data.password))
         )
+        await db.commit()
+        invalidate_user_cache(user.email)
 
-    access_token = create_access_token(
+    access_token, refresh_token = create_token_pair(
         data={
             "sub": user.email,
             "role": user.role,
             "id": user.id}
     )
 
-    refresh_token = create_refresh_token(
-        data={
-            "sub": user.email,
-            "role": user.role,
-            "id": user.id})
-
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
@@ -66,38 +79,26 @@ async def refresh_token(
     Send a refresh token to obtain a new JWT access token and refresh token.
     """
 
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate refresh token",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-
     old_refresh_token = body.refresh_token
 
     # Validate refresh JWT (signature, expiration, token type)
     try:
-        payload = jwt.decode(old_refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_refresh_token(old_refresh_token)
         email: str | None = payload.get("sub")
         token_type: str | None = payload.get("token_type")
 
         if email is None or token_type != "refresh":
-            raise credentials_exception
+            raise REFRESH_TOKEN_EXC.with_traceback(None)
 
     except jwt.ExpiredSignatureError:
-        raise credentials_exception
+        raise REFRESH_TOKEN_EXC.with_traceback(None) from None
 
     except jwt.PyJWTError:
-        raise credentials_exception
+        raise REFRESH_TOKEN_EXC.with_traceback(None) from None
 
-    result = await db.scalars(
-        select(UserModel).where(
-            UserModel.email == email,
-            UserModel.is_active == True
-        )
-    )
-    user = result.first()
+    user = await load_user_by_email(db, email)
     if user is None:
-        raise credentials_exception
+        raise REFRESH_TOKEN_EXC.with_traceback(None)
 
     new_refresh_token = create_refresh_token(
         data={
@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Request, Query, HTTPException, status, Depends
+from fastapi import APIRouter, Request, Response, Query, HTTPException, status, Depends
 
 from app.schemas.books import Book as BookSchema, BooksSearchItem, BooksSearchList
 from app.schemas.reviews import Review as ReviewSchema, ReviewCreate, ReviewList
 from app.models.reviews import Review as ReviewModel
-from app.models.users import User as UserModel
+from app.models.review_stats import ReviewStats as ReviewStatsModel
 
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from app.depends import get_async_db
+from app.crud import upsert_ignore
 
-from app.auth import get_current_user
+from app.auth import get_current_user, get_current_admin, CurrentUser, TokenUser
+from app.services.open_library import work_cache_stats
 
 
 
@@ -18,6 +21,23 @@ router = APIRouter(
     tags=["books"],
 )
 
+# Open Library search syntax for each filter of search_books
+SEARCH_QUERY_TEMPLATES = (
+    ("title", 'title:"{}"'.format),
+    ("authors", 'author:"{}"'.format),
+    ("year", "first_publish_year:{}".format),
+    ("subject", 'subject:"{}"'.format),
+    ("isbn", "isbn:{}".format),
+    ("publisher", 'publisher:"{}"'.format),
+)
+
+# Backslash-escapes Lucene special characters in user input, so a value
+# can neither close its quoted phrase nor inject query syntax
+_LUCENE_ESCAPES = str.maketrans({c: "\\" + c for c in '\\+-!():^[]"{}~*?|&/'})
+
+# Medium-size cover image URL of a search result
+SEARCH_COVER_URL = "https://covers.openlibrary.org/b/id/{}-M.jpg".format
+
 
 @router.get("/search", response_model=BooksSearchList, summary="Search books with filters")
 async def search_books(
@@ -39,60 +59,71 @@ async def search_books(
     """
     service = request.app.state.open_library_service
 
-    # Build search query parts from provided filters
-    q_parts = []
-    if title:
-        q_parts.append(f'title:"{title}"')
-    if authors:
-        q_parts.append(f'author:"{authors}"')
-    if year:
-        q_parts.append(f'first_publish_year:{year}')
-    if subject:
-        q_parts.append(f'subject:"{subject}"')
-    if isbn:
-        q_parts.append(f'isbn:{isbn}')
-    if publisher:
-        q_parts.append(f'publisher:"{publisher}"')
+    # Build the search query from the provided filters
+    filters = {
+        "title": title,
+        "authors": authors,
+        "year": year,
+        "subject": subject,
+        "isbn": isbn,
+        "publisher": publisher,
+    }
+    q = " AND ".join(
+        template(str(filters[name]).translate(_LUCENE_ESCAPES))
+        for name, template in SEARCH_QUERY_TEMPLATES
+        if filters[name]
+    )
 
     # Return empty result if no filters are provided
-    if not q_parts:
-        return BooksSearchList(items=[], total=0, page=page, page_size=page_size)
+    if not q:
+        content = BooksSearchList(items=[], total=0, page=page, page_size=page_size).model_dump_json()
+        return Response(content=content, media_type="application/json")
 
-    # Combine query parts and calculate pagination offset
-    q = " AND ".join(q_parts)
+    # Calculate pagination offset
     offset = (page - 1) * page_size
 
     results = await service.search_books(query=q, offset=offset, limit=page_size)
 
-    items = []
-    for doc in results.get("docs", []):
-        # Normalize authors list
-        authors_list = []
-        for a in doc.get("author_name", []):
-            if isinstance(a, str):
-                authors_list.append(a)
-            elif isinstance(a, dict) and "name" in a:
-                authors_list.append(a["name"])
-
-        # Build cover image URL if available
-        cover_url = f"https://covers.openlibrary.org/b/id/{doc['cover_i']}-M.jpg" if doc.get("cover_i") else None
-
-        items.append(
-            BooksSearchItem(
-                work_olid=doc.get("key", "").split("/")[-1],
-                title=doc.get("title"),
-                authors=authors_list or None,
-                year=doc.get("first_publish_year"),
-                cover_url=cover_url,
-            )
+    items = [
+        BooksSearchItem(
+            work_olid=doc.get("key", "").rsplit("/", 1)[-1],
+            title=doc.get("title"),
+            # Normalize authors list, Open Library returns either names or objects with a name
+            authors=[
+                a if isinstance(a, str) else a["name"]
+                for a in doc.get("author_name") or ()
+                if isinstance(a, str) or (isinstance(a, dict) and "name" in a)
+            ] or None,
+            year=doc.get("first_publish_year"),
+            cover_url=SEARCH_COVER_URL(doc["cover_i"]) if doc.get("cover_i") else None,
         )
+        for doc in results.get("docs", [])
+    ]
 
-    return BooksSearchList(
+    # Dumped here, FastAPI would validate the already built items a second time
+    content = BooksSearchList(
         items=items,
         total=results.get("numFound", 0),
         page=page,
         page_size=page_size,
-    )
+    ).model_dump_json()
+
+    return Response(content=content, media_type="application/json")
+
+
+# Declared before /{edition_olid}, which would match this path otherwise
+@router.get("/cache-stats", summary="Get Open Library cache statistics")
+async def get_cache_stats(
+        admin: TokenUser = Depends(get_current_admin),
+):
+    """
+    Returns hit/miss counters of the Open Library work cache of this worker process.
+
+    - Only accessible to admins
+    - `redis_hits` are lookups missing from the process cache but answered by Redis
+    - `misses` are lookups that reached the Open Library API
+    """
+    return work_cache_stats
 
 
 @router.get("/{edition_olid}", response_model=BookSchema, summary="Get detailed book information by edition OLID")
@@ -120,7 +151,7 @@ async def create_review(
         work_olid: str,
         review: ReviewCreate,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user),
+        current_user: CurrentUser = Depends(get_current_user),
         request: Request = None,
 ):
     """
@@ -133,35 +164,31 @@ async def create_review(
     """
 
     service = request.app.state.open_library_service
-    book_data = await service.get_book_by_work(work_olid)
 
-    if not book_data:
+    if not await service.book_exists(work_olid):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
-    # Check if the user has already left a review
-    existing_review = await db.scalar(
-        select(ReviewModel)
-        .where(ReviewModel.user_id == current_user.id,
-               ReviewModel.work_olid == work_olid
-               )
+    # Insert the review unless the user has already reviewed this book
+    inserted = await upsert_ignore(
+        db,
+        ReviewModel,
+        {
+            "work_olid": work_olid,
+            "user_id": current_user.id,
+            "rating": review.rating,
+            "comment": review.comment,
+        },
+        conflict_cols=("user_id", "work_olid"),
     )
+    new_review = inserted[0] if inserted else None
 
-    if existing_review:
+    if new_review is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have already reviewed this book"
         )
 
-    new_review = ReviewModel(
-        work_olid=work_olid,
-        user_id=current_user.id,
-        rating=review.rating,
-        comment=review.comment
-    )
-
-    db.add(new_review)
     await db.commit()
-    await db.refresh(new_review)
 
     return new_review
 
@@ -169,35 +196,49 @@ async def create_review(
 @router.get("/{work_olid}/reviews", response_model=ReviewList, summary="Get reviews for a book")
 async def get_review_list(
         work_olid: str,
+        page: int = Query(1, ge=1),
+        page_size: int = Query(20, ge=1, le=100),
         db: AsyncSession = Depends(get_async_db),
         request: Request = None,
 ):
     """
-    Retrieve a list of reviews for a specific book identified by Work OLID.
+    Retrieve a page of reviews for a specific book identified by Work OLID.
+
+    - Newest reviews come first
+    - `avg_rating` and `total` cover all reviews of the book
     """
 
     service = request.app.state.open_library_service
-    book_data = await service.get_book_by_work(work_olid)
 
-    if not book_data:
+    if not await service.book_exists(work_olid):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Book not found")
 
-    result = await db.execute(
-        select(ReviewModel)
-        .where(ReviewModel.work_olid == work_olid)
-    )
-    reviews = result.scalars().all()
+    # Count and rating sum are kept up to date by a trigger on the reviews table
+    stats = (await db.execute(
+        select(ReviewStatsModel.review_count, ReviewStatsModel.rating_sum)
+        .where(ReviewStatsModel.work_olid == work_olid)
+    )).one_or_none()
+    total, rating_sum = stats if stats is not None else (0, None)
+    avg_rating = rating_sum / total if total else None
 
-    if not reviews:
-        avg_rating = None
-    else:
-        avg_rating = await db.scalar(
-            select(func.avg(ReviewModel.rating))
+    offset = (page - 1) * page_size
+    reviews = []
+    if offset < total:
+        reviews = (await db.scalars(
+            select(ReviewModel)
             .where(ReviewModel.work_olid == work_olid)
-        )
-        avg_rating = round(float(avg_rating), 2)
+            .options(raiseload("*"))
+            .order_by(ReviewModel.created_at.desc(), ReviewModel.id.desc())
+            .limit(page_size)
+            .offset(offset)
+        )).all()
+
+    content = ReviewList(
+        avg_rating=round(float(avg_rating), 2) if avg_rating is not None else None,
+        reviews=reviews,
+        total=total,
+        page=page,
+        page_size=page_size,
+    ).model_dump_json()
 
-    return ReviewList(
-        avg_rating=avg_rating,
-        reviews=reviews
-    )
\ No newline at end of file
+    return Response(content=content, media_type="application/json")
@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select, delete
+from sqlalchemy.orm import selectinload, noload, raiseload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.depends import get_async_db
+from app.depends import get_async_db, get_page_cache, get_book_cache
+from app.models.books import Book as BookModel
 from app.models.bookshelves import BookShelf as BookShelfModel
 from app.models.books_in_shelf import BookInShelf as BookInShelfModel
-from app.models.users import User as UserModel
-from app.models.books import Book as BookModel
+from app.crud import upsert_ignore
+from app.services.books import load_books
+from app.services.page_cache import PageCache
 
 from app.schemas.bookshelves import BookShelf as BookShelfSchema, BookShelfCreate, BookShelfList, BookShelfUpdate
 from app.schemas.books_in_shelf import BookInShelf as BookInShelfSchema, BookAdd
-from app.auth import get_current_user
+from app.auth import get_current_user, CurrentUser
 
 
 router = APIRouter(
@@ -19,12 +23,18 @@ router = APIRouter(
     tags=["bookshelves"],
 )
 
+# Page cache namespace of the bookshelf list
+BOOKSHELVES_CACHE = "shelves"
+
+_bookshelf_list_adapter = TypeAdapter(list[BookShelfSchema])
+
 
 @router.post("/", response_model=BookShelfSchema, status_code=status.HTTP_201_CREATED, summary="Create a new bookshelf")
 async def create_bookshelf(
         bookshelf_data: BookShelfCreate,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user),
+        page_cache: PageCache = Depends(get_page_cache),
 ):
     """
     Create a new bookshelf for the current user.
@@ -33,68 +43,62 @@ async def create_bookshelf(
     - `description`: Optional description
     """
 
-    # Check if a list with the same name already exists for the user
-    result = await db.execute(
-        select(BookShelfModel).where(
-            BookShelfModel.user_id == current_user.id,
-            BookShelfModel.name == bookshelf_data.name,
-        )
+    # Create the bookshelf unless the user already has one with the same name
+    inserted = await upsert_ignore(
+        db,
+        BookShelfModel,
+        {
+            "name": bookshelf_data.name,
+            "description": bookshelf_data.description,
+            "user_id": current_user.id,
+        },
+        conflict_cols=("user_id", "name"),
     )
-    existing_bookshelf = result.scalars().first()
-
 
-    if existing_bookshelf:
+    if not inserted:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You already have a bookshelf with this name."
         )
 
-    new_bookshelf = BookShelfModel(
-        name=bookshelf_data.name,
-        description=bookshelf_data.description,
-        user_id=current_user.id,
-    )
-
-    db.add(new_bookshelf)
+    new_bookshelf = inserted[0]
     await db.commit()
-    await db.refresh(new_bookshelf)
-
-    return BookShelfSchema(
-        id=new_bookshelf.id,
-        name=new_bookshelf.name,
-        description=new_bookshelf.description,
-        created_at=new_bookshelf.created_at,
-        books=[]
-    )
+    await page_cache.invalidate(BOOKSHELVES_CACHE, current_user.id)
+
+    # A new bookshelf has no books, mark the collection as loaded
+    set_committed_value(new_bookshelf, "books", [])
+
+    return new_bookshelf
 
 
 @router.get("/", response_model=list[BookShelfSchema], summary="Get all bookshelves of the current user")
 async def get_bookshelves(
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user),
+        page_cache: PageCache = Depends(get_page_cache),
 ):
     """
     Retrieve all bookshelves belonging to the current user.
+
+    - The list is cached for a short time and dropped when a bookshelf changes
     """
 
+    cached = await page_cache.get(BOOKSHELVES_CACHE, current_user.id, "all")
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    # The list doesn't include books, so the collection is left empty
     result = await db.execute(
-        select(BookShelfModel).where(
-            BookShelfModel.user_id == current_user.id,
-        )
+        select(BookShelfModel)
+        .where(BookShelfModel.user_id == current_user.id)
+        .options(noload(BookShelfModel.books), raiseload("*"))
     )
 
-    bookshelves = result.scalars().all()
+    bookshelves = _bookshelf_list_adapter.validate_python(result.scalars().all(), from_attributes=True)
+    content = _bookshelf_list_adapter.dump_json(bookshelves)
 
-    return [
-        BookShelfSchema(
-            id=b.id,
-            name=b.name,
-            description=b.description,
-            created_at=b.created_at,
-            books=[]
-        )
-        for b in bookshelves
-    ]
+    await page_cache.set(BOOKSHELVES_CACHE, current_user.id, "all", content)
+    return Response(content=content, media_type="application/json")
 
 
 @router.get("/{bookshelf_id}", response_model=BookShelfList, summary="Get a specific bookshelf with full book details")
@@ -102,7 +106,8 @@ async def get_bookshelf(
         bookshelf_id: int,
         request: Request,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user),
+        book_cache: dict[str, BookModel] = Depends(get_book_cache),
 ):
     """
      Retrieve a specific bookshelf by its ID, including all books it contains.
@@ -115,7 +120,7 @@ async def get_bookshelf(
         select(BookShelfModel)
         .where(BookShelfModel.id == bookshelf_id,
                BookShelfModel.user_id == current_user.id)
-        .options(selectinload(BookShelfModel.books))
+        .options(selectinload(BookShelfModel.books).selectinload(BookInShelfModel.book), raiseload("*"))
     )
     bookshelf = result.scalars().first()
 
@@ -125,49 +130,41 @@ async def get_bookshelf(
             detail="Bookshelf not found"
         )
 
+    # Books already loaded with the shelf are shared with the rest of the request
+    book_cache.update((b.work_olid, b.book) for b in bookshelf.books if b.book is not None)
+
+    # Books missing from the local table are fetched from Open Library at once
     service = request.app.state.open_library_service
+    fetched = await load_books(db, service, (b.work_olid for b in bookshelf.books if b.book is None), book_cache)
+    if fetched:
+        await db.commit()
+
     books_full = []
 
     for book_in_shelf in bookshelf.books:
-        # Try to get the book from local books table
-        book = await db.scalar(
-            select(BookModel).where(BookModel.work_olid == book_in_shelf.work_olid)
-        )
-
-        # If not found locally, fetch from Open Library
-        if not book:
-            book_data = await service.get_book_by_work(book_in_shelf.work_olid)
-            if book_data:
-                book = BookModel(
-                    work_olid=book_in_shelf.work_olid,
-                    title=book_data.get("title"),
-                    authors=", ".join(book_data.get("authors") or []),
-                    cover_url=book_data.get("cover_url"),
-                    published_year=book_data.get("year"),
-                )
-                db.add(book)
-                await db.commit()
-                await db.refresh(book)
+        book = book_in_shelf.book or fetched.get(book_in_shelf.work_olid)
 
         books_full.append(
             BookInShelfSchema(
                 id=book_in_shelf.id,
                 work_olid=book_in_shelf.work_olid,
                 title=book.title if book else None,
-                authors=book.authors.split(", ") if book and book.authors else [],
+                authors=(book.authors or []) if book else [],
                 year=book.published_year if book else None,
                 cover_url=book.cover_url if book else None,
                 added_at=book_in_shelf.added_at,
             )
         )
 
-    return BookShelfList(
+    content = BookShelfList(
         id=bookshelf.id,
         name=bookshelf.name,
         description=bookshelf.description,
         created_at=bookshelf.created_at,
         books=books_full
-    )
+    ).model_dump_json()
+
+    return Response(content=content, media_type="application/json")
 
 
 @router.post("/{bookshelf_id}/books", response_model=BookInShelfSchema, status_code=status.HTTP_201_CREATED, summary="Add a book to a bookshelf")
@@ -175,7 +172,7 @@ async def add_book_in_shelf(
         bookshelf_id: int,
         book_data: BookAdd,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Add a book to a user's bookshelf.
@@ -190,6 +187,7 @@ async def add_book_in_shelf(
             BookShelfModel.id == bookshelf_id,
             BookShelfModel.user_id == current_user.id,
         )
+        .options(raiseload("*"))
     )
     bookshelf = result.scalars().first()
 
@@ -199,35 +197,24 @@ async def add_book_in_shelf(
             detail="Bookshelf not found"
         )
 
-    # Check if the book is already in the bookshelf
-    result = await db.execute(
-        select(BookInShelfModel).where(
-            BookInShelfModel.bookshelf_id == bookshelf.id,
-            BookInShelfModel.work_olid == book_data.work_olid,
-        )
+    # Add the book unless it is already in the bookshelf
+    inserted = await upsert_ignore(
+        db,
+        BookInShelfModel,
+        {"bookshelf_id": bookshelf.id, "work_olid": book_data.work_olid},
+        conflict_cols=("bookshelf_id", "work_olid"),
     )
-    existing_book = result.scalars().first()
 
-    if existing_book:
+    if not inserted:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This book is already in the bookshelf"
         )
 
-    book_in_shelf = BookInShelfModel(
-        bookshelf_id=bookshelf.id,
-        work_olid=book_data.work_olid,
-    )
-
-    db.add(book_in_shelf)
+    book_in_shelf = inserted[0]
     await db.commit()
-    await db.refresh(book_in_shelf)
 
-    return BookInShelfSchema(
-        id=book_in_shelf.id,
-        work_olid=book_in_shelf.work_olid,
-        added_at=book_in_shelf.added_at
-    )
+    return book_in_shelf
 
 
 @router.patch("/{bookshelf_id}", response_model=BookShelfSchema, summary="Update a bookshelf")
@@ -235,7 +222,8 @@ async def update_bookshelf(
         bookshelf_id: int,
         bookshelf_data: BookShelfUpdate,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user),
+        page_cache: PageCache = Depends(get_page_cache),
 ):
     """
     Update a specific bookshelf of the current user.
@@ -249,6 +237,7 @@ async def update_bookshelf(
             BookShelfModel.id == bookshelf_id,
             BookShelfModel.user_id == current_user.id,
         )
+        .options(raiseload("*"))
     )
     bookshelf = result.scalars().first()
 
@@ -265,43 +254,43 @@ async def update_bookshelf(
         bookshelf.description = bookshelf_data.description
 
     await db.commit()
-    await db.refresh(bookshelf)
+    await page_cache.invalidate(BOOKSHELVES_CACHE, current_user.id)
 
-    return BookShelfSchema(
-        id=bookshelf.id,
-        name=bookshelf.name,
-        description=bookshelf.description,
-        created_at=bookshelf.created_at,
-        books=[]
-    )
+    # Books are not part of the update response
+    set_committed_value(bookshelf, "books", [])
+
+    return bookshelf
 
 
 @router.delete("/{bookshelf_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a bookshelf")
 async def delete_bookshelf(
         bookshelf_id: int,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user),
+        page_cache: PageCache = Depends(get_page_cache),
 ):
     """
     Delete a specific bookshelf of the current user.
     """
 
+    # Books in the shelf are removed by the bookshelf_id ON DELETE CASCADE
     result = await db.execute(
-        select(BookShelfModel).where(
+        delete(BookShelfModel)
+        .where(
             BookShelfModel.id == bookshelf_id,
             BookShelfModel.user_id == current_user.id,
         )
+        .returning(BookShelfModel.id)
     )
-    bookshelf = result.scalars().first()
 
-    if not bookshelf:
+    if result.first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Bookshelf not found"
         )
 
-    await db.delete(bookshelf)
     await db.commit()
+    await page_cache.invalidate(BOOKSHELVES_CACHE, current_user.id)
 
     return None
 
@@ -311,41 +300,45 @@ async def delete_book_from_shelf(
         bookshelf_id: int,
         book_id: int,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Delete a specific book from a user's bookshelf.
     """
 
+    # Ownership of the shelf is checked inside the DELETE itself
     result = await db.execute(
-        select(BookShelfModel).where(
-            BookShelfModel.id == bookshelf_id,
-            BookShelfModel.user_id == current_user.id
+        delete(BookInShelfModel)
+        .where(
+            BookInShelfModel.id == book_id,
+            BookInShelfModel.bookshelf_id == bookshelf_id,
+            BookInShelfModel.bookshelf_id.in_(
+                select(BookShelfModel.id).where(BookShelfModel.user_id == current_user.id)
+            ),
         )
+        .returning(BookInShelfModel.id)
     )
-    bookshelf = result.scalars().first()
 
-    if not bookshelf:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Bookshelf not found"
+    if result.first() is None:
+        # Nothing was deleted, find out which of the two is missing
+        shelf = await db.scalar(
+            select(BookShelfModel.id).where(
+                BookShelfModel.id == bookshelf_id,
+                BookShelfModel.user_id == current_user.id
+            )
         )
 
-    result = await db.execute(
-        select(BookInShelfModel).where(
-            BookInShelfModel.id == book_id,
-            BookInShelfModel.bookshelf_id == bookshelf.id
-        )
-    )
-    book = result.scalars().first()
+        if shelf is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Bookshelf not found"
+            )
 
-    if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found in this bookshelf"
         )
 
-    await db.delete(book)
     await db.commit()
 
     return None
\ No newline at end of file
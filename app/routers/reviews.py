@@ -1,14 +1,13 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
 
 from app.depends import get_async_db
 from app.models.reviews import Review as ReviewModel
-from app.models.users import User as UserModel
 
 from app.schemas.reviews import Review as ReviewSchema, ReviewUpdate
-from app.auth import get_current_user
+from app.auth import get_current_user, CurrentUser
 
 
 router = APIRouter(
@@ -17,12 +16,31 @@ router = APIRouter(
 )
 
 
+async def raise_review_not_owned(db: AsyncSession, review_id: int, detail: str) -> None:
+    """
+    Raises 404 if the review does not exist, otherwise 403 with `detail`.
+
+    Called only after an ownership-filtered statement matched no rows.
+    """
+
+    if await db.scalar(lambda_stmt(lambda: select(ReviewModel.id).where(ReviewModel.id == review_id))) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found",
+        )
+
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=detail,
+    )
+
+
 @router.patch("/{review_id}", response_model=ReviewSchema, summary="Update a review")
 async def patch_review(
     review_id: int,
     review: ReviewUpdate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Update a review.
@@ -30,22 +48,6 @@ async def patch_review(
     - Admin can update any review
     """
 
-    review_db = await db.scalar(
-        select(ReviewModel).where(ReviewModel.id == review_id)
-    )
-
-    if not review_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Review not found",
-        )
-
-    if review_db.user_id != current_user.id and current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can edit only your own review",
-        )
-
     update_data = review.model_dump(exclude_unset=True)
 
     if not update_data:
@@ -54,14 +56,23 @@ async def patch_review(
             detail="No data provided for update",
         )
 
-    for field, value in update_data.items():
-        setattr(review_db, field, value)
+    # Update and read back the review in one statement
+    stmt = (
+        update(ReviewModel)
+        .where(ReviewModel.id == review_id)
+        .values(**update_data, updated_at=datetime.now(timezone.utc))
+        .returning(ReviewModel)
+    )
+    if current_user.role != "admin":
+        stmt = stmt.where(ReviewModel.user_id == current_user.id)
+
+    review_db = await db.scalar(stmt)
 
-    review_db.updated_at = datetime.now(timezone.utc)
+    if review_db is None:
+        # Nothing was updated, the review is either missing or someone else's
+        await raise_review_not_owned(db, review_id, "You can edit only your own review")
 
-    db.add(review_db)
     await db.commit()
-    await db.refresh(review_db)
 
     return review_db
 
@@ -70,7 +81,7 @@ async def patch_review(
 async def delete_review(
     review_id: int,
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Delete a review.
@@ -78,23 +89,16 @@ async def delete_review(
     - Admin can delete any review
     """
 
-    review_db = await db.scalar(
-        select(ReviewModel).where(ReviewModel.id == review_id)
-    )
+    stmt = delete(ReviewModel).where(ReviewModel.id == review_id)
+    if current_user.role != "admin":
+        stmt = stmt.where(ReviewModel.user_id == current_user.id)
 
-    if not review_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Review not found",
-        )
+    result = await db.execute(stmt.returning(ReviewModel.id))
 
-    if review_db.user_id != current_user.id and current_user.role != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can delete only your own review",
-        )
+    if result.first() is None:
+        # Nothing was deleted, the review is either missing or someone else's
+        await raise_review_not_owned(db, review_id, "You can delete only your own review")
 
-    await db.delete(review_db)
     await db.commit()
 
     return None
\ No newline at end of file
@@ -1,30 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update, func, literal, lambda_stmt, tuple_, Text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-import httpx
+from sqlalchemy.orm import joinedload, raiseload
+import orjson
 from datetime import datetime, UTC
 
 from app.depends import get_async_db
+from app.crud import upsert_ignore
+from app.pagination import encode_cursor, decode_cursor
+from app.http_cache import PRIVATE_CACHE_CONTROL, weak_etag, etag_matches
 from app.models.user_books import UserBook as UserBookModel
-from app.models.users import User as UserModel
 from app.models.books import Book as BookModel
 
-from app.schemas.user_books import UserBook as UserBookSchema, UserBookAdd, ReadingStatus, UserBookUpdate
-from app.auth import get_current_user
-from app.services.open_library import OpenLibraryService
+from app.schemas.user_books import UserBook as UserBookSchema, UserBookAdd, UserBookList, ReadingStatus, UserBookUpdate
+from app.auth import get_current_user, CurrentUser
 
 
+# Rows fetched from the server-side cursor at a time by get_user_books
+USER_BOOKS_STREAM_BATCH = 50
+
 router = APIRouter(
     prefix="/user-books",
     tags=["user-books"],
 )
 
 
+def _user_book_columns(user_books) -> tuple:
+    """
+    Response columns of reading-list entries joined with books, named after the UserBookSchema fields
+    """
+    c = user_books.c
+    return (
+        c.id,
+        c.work_olid,
+        c.status,
+        c.progress_percent,
+        c.rating,
+        c.started_at,
+        c.finished_at,
+        c.created_at,
+        c.updated_at,
+        BookModel.title,
+        func.coalesce(BookModel.authors, literal([], ARRAY(Text))).label("authors"),
+        BookModel.cover_url,
+        BookModel.published_year,
+    )
+
+
+def _ub_to_schema(user_book: UserBookModel, book: BookModel | None) -> UserBookSchema:
+    """
+    Response of a reading-list entry, built without validation from database values
+    """
+    return UserBookSchema.model_construct(
+        id=user_book.id,
+        work_olid=user_book.work_olid,
+        status=user_book.status,
+        progress_percent=user_book.progress_percent,
+        rating=user_book.rating,
+        started_at=user_book.started_at,
+        finished_at=user_book.finished_at,
+        created_at=user_book.created_at,
+        updated_at=user_book.updated_at,
+        title=book.title if book else None,
+        authors=(book.authors or []) if book else [],
+        cover_url=book.cover_url if book else None,
+        published_year=book.published_year if book else None
+    )
+
+
 @router.post("/", response_model=UserBookSchema, status_code=status.HTTP_201_CREATED, summary="Add a book to user's reading list")
 async def add_user_book(
         book_data: UserBookAdd,
+        request: Request,
         db: AsyncSession = Depends(get_async_db),
-        current_user: UserModel = Depends(get_current_user),
+        current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Add a book to the current user's personal reading list.
@@ -34,92 +85,98 @@ async def add_user_book(
     - Progress and rating can be set during creation
     """
 
-    # Check if already in user's list
-    existing = await db.scalar(
-        select(UserBookModel).where(
-            UserBookModel.user_id == current_user.id,
-            UserBookModel.work_olid == book_data.work_olid
-        )
+    # Insert the entry unless the book is already in the user's list
+    inserted = await upsert_ignore(
+        db,
+        UserBookModel,
+        {
+            "user_id": current_user.id,
+            "work_olid": book_data.work_olid,
+            "status": book_data.status,
+            "progress_percent": book_data.progress_percent,
+            "rating": book_data.rating,
+        },
+        conflict_cols=("user_id", "work_olid"),
     )
-    if existing:
+    if not inserted:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This book is already in your list"
         )
+    user_book = inserted[0]
 
     # Check if book exists in local books table
+    work_olid = book_data.work_olid
     book = await db.scalar(
-        select(BookModel).where(BookModel.work_olid == book_data.work_olid)
+        lambda_stmt(lambda: select(BookModel).where(BookModel.work_olid == work_olid))
     )
 
-    # If not — fetch from OpenLibrary and save
-    if not book:
-        async with httpx.AsyncClient(base_url="https://openlibrary.org") as client:
-            service = OpenLibraryService(client)
-            book_data_ol = await service.get_book_by_work(book_data.work_olid)
-
-        if book_data_ol:
-            book = BookModel(
-                work_olid=book_data_ol["work_olid"],
-                title=book_data_ol["title"],
-                authors=", ".join(book_data_ol["authors"]) if book_data_ol["authors"] else None,
-                cover_url=book_data_ol["cover_url"],
-                published_year=book_data_ol["year"],
-            )
-            db.add(book)
-            await db.commit()
-            await db.refresh(book)
-
-    user_book = UserBookModel(
-        user_id=current_user.id,
-        work_olid=book_data.work_olid,
-        status=book_data.status,
-        progress_percent=book_data.progress_percent,
-        rating=book_data.rating
-    )
+    # If not — take it from Open Library
+    book_data_ol = None
+    if book is None:
+        service = request.app.state.open_library_service
+        book_data_ol = await service.get_book_by_work(work_olid)
+
+    if book_data_ol:
+        # Another request may save the same book meanwhile, its row is used then
+        book_olid = book_data_ol["work_olid"]
+        saved = await upsert_ignore(
+            db,
+            BookModel,
+            {
+                "work_olid": book_olid,
+                "title": book_data_ol["title"],
+                "authors": book_data_ol["authors"],
+                "cover_url": book_data_ol["cover_url"],
+                "published_year": book_data_ol["year"],
+            },
+            conflict_cols=("work_olid",),
+        )
+        book = saved[0] if saved else await db.scalar(
+            lambda_stmt(lambda: select(BookModel).where(BookModel.work_olid == book_olid))
+        )
 
-    db.add(user_book)
+    # The entry and a newly fetched book are saved together
     await db.commit()
-    await db.refresh(user_book)
 
-    return UserBookSchema(
-        id=user_book.id,
-        work_olid=user_book.work_olid,
-        status=user_book.status.value,
-        progress_percent=user_book.progress_percent,
-        rating=user_book.rating,
-        started_at=user_book.started_at,
-        finished_at=user_book.finished_at,
-        created_at=user_book.created_at,
-        updated_at=user_book.updated_at,
-        title=book.title if book else None,
-        authors=book.authors.split(", ") if book and book.authors else [],
-        cover_url=book.cover_url if book else None,
-        published_year=book.published_year if book else None
-    )
+    return _ub_to_schema(user_book, book)
 
 
 
-@router.get("/", response_model=list[UserBookSchema], summary="Get user's reading list",)
+@router.get("/", response_model=UserBookList, summary="Get user's reading list",)
 async def get_user_books(
-    page: int = Query(1, ge=1),
+    request: Request,
+    cursor: str | None = Query(None, description="`next_cursor` of the previous page"),
     page_size: int = Query(20, ge=1, le=100),
     status_filter: ReadingStatus | None = Query(None),
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Retrieve the current user's personal reading list.
 
     - Optional filtering by `status` (PLANNED, READING, COMPLETED)
-    - Pagination supported via `page` and `page_size`
+    - Newest books first, pass `next_cursor` of a page as `cursor` to get the next one
     - Returns full book details (title, authors, cover, year) along with user progress and rating
+    - Answers 304 when `If-None-Match` holds the ETag of an unchanged page
     """
 
-    offset = (page - 1) * page_size
+    # Entries change updated_at or the count, their books are only ever inserted
+    last_update, total, saved_books = (await db.execute(
+        select(func.max(UserBookModel.updated_at), func.count(), func.count(BookModel.id))
+        .select_from(UserBookModel)
+        .outerjoin(BookModel, BookModel.work_olid == UserBookModel.work_olid)
+        .where(UserBookModel.user_id == current_user.id)
+    )).one()
+    etag = weak_etag(current_user.id, last_update, total, saved_books, status_filter, cursor, page_size)
+    headers = {"ETag": etag, "Cache-Control": PRIVATE_CACHE_CONTROL}
+
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
+    # Only the columns of the response are selected
     query = (
-        select(UserBookModel, BookModel)
+        select(*_user_book_columns(UserBookModel.__table__))
         .outerjoin(BookModel, BookModel.work_olid == UserBookModel.work_olid)
         .where(UserBookModel.user_id == current_user.id)
     )
@@ -127,33 +184,35 @@ async def get_user_books(
     if status_filter:
         query = query.where(UserBookModel.status == status_filter)
 
-    query = query.limit(page_size).offset(offset)
-
-    result = await db.execute(query)
-    rows = result.all()
-
-    books_full = []
-
-    for user_book, book in rows:
-        books_full.append(
-            UserBookSchema(
-                id=user_book.id,
-                work_olid=user_book.work_olid,
-                status=user_book.status.value,
-                progress_percent=user_book.progress_percent,
-                rating=user_book.rating,
-                started_at=user_book.started_at,
-                finished_at=user_book.finished_at,
-                created_at=user_book.created_at,
-                updated_at=user_book.updated_at,
-                title=book.title if book else None,
-                authors=book.authors.split(", ") if book and book.authors else [],
-                cover_url=book.cover_url if book else None,
-                published_year=book.published_year if book else None
-            )
-        )
-
-    return books_full
+    # Keyset pagination, the page starts right after the last row of the previous one
+    if cursor:
+        query = query.where(tuple_(UserBookModel.created_at, UserBookModel.id) < decode_cursor(cursor))
+
+    # One extra row tells whether there is a next page
+    query = query.order_by(UserBookModel.created_at.desc(), UserBookModel.id.desc()).limit(page_size + 1)
+
+    result = await db.stream(query.execution_options(yield_per=USER_BOOKS_STREAM_BATCH))
+
+    async def render():
+        # Each row is encoded as soon as it arrives, the page is never held in memory.
+        # Rows come straight from the database and match UserBookSchema, so they skip validation.
+        next_cursor = None
+        sent = 0
+        last = None
+        try:
+            yield b'{"items":['
+            async for row in result:
+                if sent == page_size:
+                    next_cursor = encode_cursor(last.created_at, last.id)
+                    break
+                yield (b"," if sent else b"") + orjson.dumps(row._asdict(), option=orjson.OPT_UTC_Z)
+                last = row
+                sent += 1
+        finally:
+            await result.close()
+        yield b'],"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+
+    return StreamingResponse(render(), media_type="application/json", headers=headers)
 
 
 @router.patch("/{user_book_id}", response_model=UserBookSchema, summary="Update a book in user's reading list")
@@ -161,7 +220,7 @@ async def update_user_book(
     user_book_id: int,
     book_update: UserBookUpdate,
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Partially update a book in the user's reading list.
@@ -171,11 +230,41 @@ async def update_user_book(
     - Automatically sets `finished_at` and `progress_percent=100` when status becomes COMPLETED or progress reaches 100%
     """
 
+    update_data = book_update.model_dump(exclude_unset=True)
+
+    # A rating doesn't depend on the current state of the entry, so a rating-only change
+    # is a single UPDATE whose RETURNING is joined with the book for the response
+    if update_data.keys() == {"rating"}:
+        updated = (
+            update(UserBookModel)
+            .where(
+                UserBookModel.id == user_book_id,
+                UserBookModel.user_id == current_user.id
+            )
+            .values(rating=update_data["rating"])
+            .returning(*UserBookModel.__table__.c)
+            .cte("updated")
+        )
+        row = (await db.execute(
+            select(*_user_book_columns(updated))
+            .outerjoin(BookModel, BookModel.work_olid == updated.c.work_olid)
+        )).first()
+
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User book not found"
+            )
+
+        await db.commit()
+        return UserBookSchema.model_construct(**row._mapping)
+
     user_book = await db.scalar(
         select(UserBookModel).where(
             UserBookModel.id == user_book_id,
             UserBookModel.user_id == current_user.id
         )
+        .options(joinedload(UserBookModel.book), raiseload("*"))
     )
 
     if not user_book:
@@ -184,8 +273,6 @@ async def update_user_book(
             detail="User book not found"
         )
 
-    update_data = book_update.model_dump(exclude_unset=True)
-
     # Status update
     if "status" in update_data:
         new_status = update_data["status"]
@@ -228,35 +315,20 @@ async def update_user_book(
     if "rating" in update_data:
         user_book.rating = update_data["rating"]
 
-    await db.commit()
-    await db.refresh(user_book)
+    # The book was loaded together with the entry and doesn't change here
+    book = user_book.book
 
-    book = await db.scalar(
-        select(BookModel).where(BookModel.work_olid == user_book.work_olid)
-    )
+    # updated_at comes back in the UPDATE ... RETURNING, see UserBook.__mapper_args__
+    await db.commit()
 
-    return UserBookSchema(
-        id=user_book.id,
-        work_olid=user_book.work_olid,
-        status=user_book.status.value,
-        progress_percent=user_book.progress_percent,
-        rating=user_book.rating,
-        started_at=user_book.started_at,
-        finished_at=user_book.finished_at,
-        created_at=user_book.created_at,
-        updated_at=user_book.updated_at,
-        title=book.title if book else None,
-        authors=book.authors.split(", ") if book and book.authors else [],
-        cover_url=book.cover_url if book else None,
-        published_year=book.published_year if book else None
-    )
+    return _ub_to_schema(user_book, book)
 
 
 @router.delete("/{user_book_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Remove a book from user's reading list")
 async def delete_user_book(
     user_book_id: int,
     db: AsyncSession = Depends(get_async_db),
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Delete a book from the current user's personal reading list.
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.users import User as UserModel
-from app.schemas.users import User as UserSchema, UserCreate, UserUpdate
+from app.schemas.users import User as UserSchema, UserCreate, UserUpdate, UserList
 from app.depends import get_async_db
-from app.auth import hash_password
-from app.auth import get_current_user, get_current_admin
+from app.crud import upsert_ignore
+from app.responses import ORJSONResponse
+from app.http_cache import PRIVATE_CACHE_CONTROL, weak_etag, etag_matches
+from app.auth import ahash_password
+from app.auth import get_current_user, get_current_admin, invalidate_user_cache, CurrentUser, TokenUser
+
+
+# Columns of UserSchema, password hashes never leave the database
+USER_COLUMNS = (UserModel.id, UserModel.email, UserModel.username, UserModel.role, UserModel.is_active)
+USER_OWNER_FIELDS = {"username"}
+USER_ADMIN_FIELDS = {"username", "role", "is_active"}
 
 
 router = APIRouter(
@@ -17,33 +27,78 @@ router = APIRouter(
 
 @router.get("/me", response_model=UserSchema, summary="Get current user info")
 async def get_me(
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Returns the information of the currently authenticated user.
     """
-    return current_user
 
+    # The user is already loaded and trusted, skip validating it against UserSchema again
+    return ORJSONResponse({
+        "id": current_user.id,
+        "email": current_user.email,
+        "username": current_user.username,
+        "role": current_user.role,
+        "is_active": current_user.is_active,
+    })
 
-@router.get("/", response_model=list[UserSchema], summary="Get all users")
+
+@router.get("/", response_model=UserList, summary="Get all users")
 async def get_users(
-    admin: UserModel = Depends(get_current_admin),
+    request: Request,
+    after_id: int = Query(0, ge=0, description="`next_after_id` of the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    admin: TokenUser = Depends(get_current_admin),
     db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Returns a list of all registered users.
+    Returns a page of registered users ordered by ID.
 
     - Only accessible to admins
+    - Pass `next_after_id` as `after_id` to get the next page
+    - Answers 304 when `If-None-Match` holds the ETag of an unchanged list
     """
 
-    result = await db.scalars(select(UserModel))
-    return result.all()
+    # Fingerprint of the rows this page would read, a primary key seek like the page itself.
+    # An update moves the latest updated_at, an insert or delete changes the ordered list of IDs.
+    page_rows = (
+        select(UserModel.id, UserModel.updated_at)
+        .where(UserModel.id > after_id)
+        .order_by(UserModel.id)
+        .limit(limit + 1)
+        .subquery()
+    )
+    last_update, ids = (await db.execute(
+        select(
+            func.max(page_rows.c.updated_at),
+            func.array_agg(aggregate_order_by(page_rows.c.id, page_rows.c.id)),
+        )
+    )).one()
+    etag = weak_etag(last_update, ids, after_id, limit)
+    headers = {"ETag": etag, "Cache-Control": PRIVATE_CACHE_CONTROL}
+
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # Keyset paging on the primary key, one extra row tells if there is a next page
+    result = await db.execute(
+        select(*USER_COLUMNS)
+        .where(UserModel.id > after_id)
+        .order_by(UserModel.id)
+        .limit(limit + 1)
+    )
+    users = result.mappings().all()
+    next_after_id = users[limit - 1]["id"] if len(users) > limit else None
+
+    # Validated and dumped in one pass, FastAPI doesn't validate the page a second time
+    page = UserList.model_validate({"items": users[:limit], "next_after_id": next_after_id})
+    return Response(content=page.model_dump_json(), media_type="application/json", headers=headers)
 
 
 @router.get("/{user_id}", response_model=UserSchema, summary="Get user by ID")
 async def get_user(
     user_id: int,
-    admin: UserModel = Depends(get_current_admin),
+    admin: TokenUser = Depends(get_current_admin),
     db: AsyncSession = Depends(get_async_db),
 ):
     """
@@ -52,10 +107,8 @@ async def get_user(
     - Only admins can access this endpoint
     """
 
-    result = await db.scalars(
-        select(UserModel).where(UserModel.id == user_id)
-    )
-    user = result.first()
+    result = await db.execute(select(*USER_COLUMNS).where(UserModel.id == user_id))
+    user = result.mappings().first()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -67,7 +120,7 @@ async def get_user(
 async def update_user(
     user_id: int,
     data: UserUpdate,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db),
 ):
     """
@@ -77,34 +130,45 @@ async def update_user(
     - Admins can update username, role, and active status
     """
 
-    result = await db.scalars(
-        select(UserModel).where(UserModel.id == user_id)
-    )
-    user = result.first()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     is_admin = current_user.role == "admin"
     is_owner = current_user.id == user_id
 
     if not (is_admin or is_owner):
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    if not is_admin and data.username is not None:
-        user.username = data.username
+    # Users can change only their username, admins also the role and active status
+    allowed = USER_ADMIN_FIELDS if is_admin else USER_OWNER_FIELDS
+    changes = {
+        field: value
+        for field, value in data.model_dump(include=allowed).items()
+        if value is not None
+    }
+
+    if not changes:
+        # Nothing to write, a user editing themselves is already loaded by get_current_user
+        if is_owner:
+            return current_user
+
+        result = await db.execute(select(*USER_COLUMNS).where(UserModel.id == user_id))
+        user = result.mappings().first()
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+
+    # One UPDATE ... RETURNING instead of SELECT, flush and refresh
+    user = await db.scalar(
+        update(UserModel)
+        .where(UserModel.id == user_id)
+        .values(**changes)
+        .returning(UserModel)
+    )
 
-    if is_admin:
-        if data.username is not None:
-            user.username = data.username
-        if data.role is not None:
-            user.role = data.role
-        if data.is_active is not None:
-            user.is_active = data.is_active
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    db.add(user)
     await db.commit()
-    await db.refresh(user)
+
+    invalidate_user_cache(user.email)
 
     return user
 
@@ -112,7 +176,7 @@ async def update_user(
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a user")
 async def delete_user(
     user_id: int,
-    current_user: UserModel = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db),
 ):
     """
@@ -122,22 +186,25 @@ async def delete_user(
     - Admins can delete any user
     """
 
-    result = await db.scalars(
-        select(UserModel).where(UserModel.id == user_id)
-    )
-    user = result.first()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     is_admin = current_user.role == "admin"
     is_owner = current_user.id == user_id
 
     if not (is_admin or is_owner):
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    await db.delete(user)
+    # Favorites, reviews, bookshelves and reading list go with the ON DELETE CASCADE
+    email = await db.scalar(
+        delete(UserModel)
+        .where(UserModel.id == user_id)
+        .returning(UserModel.email)
+    )
+
+    if email is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
     await db.commit()
+
+    invalidate_user_cache(email)
     return None
 
 
@@ -153,23 +220,26 @@ async def create_user(
     - Role is set to 'user' by default
     """
 
-    result = await db.scalar(select(UserModel).where(UserModel.email == user.email))
-    if result:
+    # The unique email index rejects duplicates in the same round trip as the insert
+    inserted = await upsert_ignore(
+        db,
+        UserModel,
+        {
+            "email": user.email,
+            "username": user.username,
+            "hashed_password": await ahash_password(user.password),
+            "role": "user",
+            "is_active": True,
+        },
+        conflict_cols=("email",),
+    )
+    if not inserted:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="User already exists"
         )
 
-    db_user = UserModel(
-        email=user.email,
-        username=user.username,
-        hashed_password=hash_password(user.password),
-        role="user",
-        is_active=True,
-    )
-
-    db.add(db_user)
+    db_user = inserted[0]
     await db.commit()
-    await db.refresh(db_user)
 
     return db_user
\ No newline at end of file
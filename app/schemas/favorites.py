@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, ConfigDict, field_validator
+from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
 
 
@@ -14,14 +14,6 @@ class Favorite(BaseModel):
     cover_url: str | None = Field(None, title="Cover URL")
     created_at: datetime | None = Field(None, title="Created at")
 
-    @field_validator("authors", mode="before")
-    @classmethod
-    def split_authors(cls, v):
-        # Normalize authors field
-        if isinstance(v, str):
-            return [author.strip() for author in v.split(",")]
-        return v
-
     model_config = ConfigDict(from_attributes=True)
 
 
@@ -34,7 +34,10 @@ class Review(BaseModel):
 
 class ReviewList(BaseModel):
     """
-    Schema for returning list of reviews with average rating.
+    Schema for returning a page of reviews with average rating.
     """
     avg_rating: float | None = Field(None, ge=1.0, le=5.0, description="Average review rating from 1 to 5")
-    reviews: list[Review] = Field(..., description="List of reviews for the book")
\ No newline at end of file
+    reviews: list[Review] = Field(..., description="Reviews for the book on this page")
+    total: int = Field(0, ge=0, description="Total number of reviews for the book")
+    page: int = Field(1, ge=1, description="Current page number")
+    page_size: int = Field(20, ge=1, description="Reviews per page")
\ No newline at end of file
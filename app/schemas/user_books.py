@@ -43,4 +43,12 @@ class UserBook(BaseModel):
     cover_url: str | None = Field(None, description="Book cover url")
     published_year: int | None = Field(None, description="Book published year")
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserBookList(BaseModel):
+    """
+    Page of the user's reading list, newest first.
+    """
+    items: list[UserBook] = Field(description="Books on this page")
+    next_cursor: str | None = Field(None, description="Cursor of the next page, null on the last page")
@@ -1,12 +1,26 @@
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import Literal
+from pydantic import BaseModel, Field, ConfigDict, StringConstraints, AfterValidator
+from typing import Annotated, Literal
+
+
+def _lower_email_domain(value: str) -> str:
+    local, _, domain = value.rpartition("@")
+    return f"{local}@{domain.lower()}"
+
+
+# Format check with a regex compiled once by pydantic-core instead of a full
+# RFC parse by email-validator. Domains are case-insensitive and stored lowercased.
+Email = Annotated[
+    str,
+    StringConstraints(strip_whitespace=True, max_length=255, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$"),
+    AfterValidator(_lower_email_domain),
+]
 
 
 class UserCreate(BaseModel):
     """
     Schema for creating a new user.
     """
-    email: EmailStr = Field(..., description="Email address of the user")
+    email: Email = Field(..., description="Email address of the user")
     password: str = Field(..., min_length=8, description="Password of the user (minimum 8 characters)")
     username: str = Field(..., max_length=25, description="Username of the user")
 
@@ -16,7 +30,8 @@ class User(BaseModel):
     Schema for returning user data.
     """
     id: int = Field(..., description="ID of the user")
-    email: EmailStr = Field(..., description="Email address of the user")
+    # Stored addresses were validated on sign-up
+    email: str = Field(..., description="Email address of the user")
     username: str = Field(..., description="Username of the user")
     role: Literal["user", "admin"] = Field(..., description="Role of the user (user or admin)")
     is_active: bool = Field(..., description="Is active?")
@@ -30,4 +45,12 @@ class UserUpdate(BaseModel):
     """
     username: str | None = Field(None, description="Username of the user")
     role: Literal["user", "admin"] = Field(..., description="Role of the user (user or admin)")
-    is_active: bool | None = Field(None, description="Is active?")
\ No newline at end of file
+    is_active: bool | None = Field(None, description="Is active?")
+
+
+class UserList(BaseModel):
+    """
+    Page of users ordered by ID.
+    """
+    items: list[User] = Field(description="Users on this page")
+    next_after_id: int | None = Field(None, description="`after_id` of the next page, null on the last page")
@@ -0,0 +1,83 @@
+import asyncio
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import upsert_ignore
+from app.models.books import Book as BookModel
+from app.services.open_library import OpenLibraryService
+
+
+# Upper bound on concurrent Open Library requests made by one load_books call
+OPEN_LIBRARY_CONCURRENCY = 10
+
+
+async def load_books(
+        db: AsyncSession,
+        service: OpenLibraryService,
+        work_olids: Iterable[str],
+        cache: dict[str, BookModel] | None = None,
+) -> dict[str, BookModel]:
+    """
+    Returns books by work OLID from the local books table.
+
+    - Books already in `cache` are reused, and every loaded book is added to it
+    - All local books are loaded with a single IN query
+    - Missing books are fetched from Open Library concurrently and saved with one INSERT ... ON CONFLICT
+    - OLIDs unknown to Open Library are left out of the result
+    - Doesn't commit, the caller owns the transaction
+    """
+
+    if cache is None:
+        cache = {}
+
+    olids = list(dict.fromkeys(work_olids))
+    books = {olid: cache[olid] for olid in olids if olid in cache}
+
+    uncached = [olid for olid in olids if olid not in books]
+    if not uncached:
+        return books
+
+    result = await db.scalars(
+        select(BookModel).where(BookModel.work_olid.in_(uncached))
+    )
+    books.update((book.work_olid, book) for book in result)
+
+    missing = [olid for olid in uncached if olid not in books]
+    if missing:
+        semaphore = asyncio.Semaphore(OPEN_LIBRARY_CONCURRENCY)
+
+        async def fetch(olid: str) -> dict | None:
+            async with semaphore:
+                return await service.get_book_by_work(olid)
+
+        # A failed lookup only leaves that book out
+        fetched = await asyncio.gather(*(fetch(olid) for olid in missing), return_exceptions=True)
+
+        new_rows = [
+            {
+                "work_olid": olid,
+                "title": book_data.get("title"),
+                "authors": book_data.get("authors"),
+                "cover_url": book_data.get("cover_url"),
+                "published_year": book_data.get("year"),
+            }
+            for olid, book_data in zip(missing, fetched)
+            if isinstance(book_data, dict)
+        ]
+
+        if new_rows:
+            # Save all fetched books in one statement, rows saved meanwhile by another request are skipped
+            inserted = await upsert_ignore(db, BookModel, new_rows, conflict_cols=("work_olid",))
+            books.update((book.work_olid, book) for book in inserted)
+
+            skipped = [row["work_olid"] for row in new_rows if row["work_olid"] not in books]
+            if skipped:
+                result = await db.scalars(
+                    select(BookModel).where(BookModel.work_olid.in_(skipped))
+                )
+                books.update((book.work_olid, book) for book in result)
+
+    cache.update(books)
+    return books
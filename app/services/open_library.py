@@ -1,23 +1,77 @@
+import asyncio
+import hashlib
 import httpx
+import orjson
 import re
+from cachetools import TTLCache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 
 BASE_URL = "https://openlibrary.org"
 
+# Works rarely change in Open Library, so found works are kept for a day.
+# Unknown OLIDs are remembered for a short time only.
+WORK_CACHE_TTL_SECONDS = 24 * 60 * 60
+MISSING_WORK_CACHE_TTL_SECONDS = 5 * 60
+SEARCH_CACHE_TTL_SECONDS = 10 * 60
+
+_work_cache = TTLCache(maxsize=50_000, ttl=WORK_CACHE_TTL_SECONDS)
+_missing_work_cache = TTLCache(maxsize=10_000, ttl=MISSING_WORK_CACHE_TTL_SECONDS)
+
+# Hit/miss counters of the work cache, redis_hits are lookups answered by Redis
+work_cache_stats = {"hits": 0, "redis_hits": 0, "misses": 0}
+
 
 class OpenLibraryService:
-    def __init__(self, client: httpx.AsyncClient):
+    def __init__(self, client: httpx.AsyncClient, redis: Redis | None = None):
         self.client = client
+        # Optional cache shared between workers, in front of the Open Library API
+        self.redis = redis
+        # Work lookups in progress, concurrent requests for the same OLID share one
+        self._work_lookups: dict[str, asyncio.Task] = {}
+
+    async def _cache_get(self, key: str) -> bytes | None:
+        """
+        Reads a cached value from Redis, a failing Redis is treated as a miss
+        """
+        if self.redis is None:
+            return None
+        try:
+            return await self.redis.get(key)
+        except RedisError:
+            return None
+
+    async def _cache_set(self, key: str, value, ttl: int) -> None:
+        """
+        Stores a value in Redis as JSON, errors are ignored
+        """
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(key, orjson.dumps(value), ex=ttl)
+        except RedisError:
+            pass
 
     async def search_books(self, query: str, limit: int = 10, offset: int = 0):
         """
         Performs a book search in Open Library using the constructed search query
         """
+        digest = hashlib.blake2b(f"{query}|{limit}|{offset}".encode(), digest_size=16).hexdigest()
+        key = f"ol:s:{digest}"
+
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+
         response = await self.client.get(
             "/search.json",
             params={"q": query, "limit": limit, "offset": offset}
         )
         response.raise_for_status()
-        return response.json()
+        results = response.json()
+
+        await self._cache_set(key, results, SEARCH_CACHE_TTL_SECONDS)
+        return results
 
 
     async def get_book_by_edition(self, edition_id: str) -> dict | None:
@@ -122,13 +176,56 @@ class OpenLibraryService:
 
     async def get_book_by_work(self, work_id: str) -> dict | None:
         """
-        Returns detailed information about a book by work OLID
+        Returns detailed information about a book by work OLID.
+        Results are cached, see WORK_CACHE_TTL_SECONDS
         """
 
+        if work_id in _work_cache:
+            work_cache_stats["hits"] += 1
+            return _work_cache[work_id]
+        if work_id in _missing_work_cache:
+            work_cache_stats["hits"] += 1
+            return None
+
+        lookup = self._work_lookups.get(work_id)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._load_work(work_id))
+            self._work_lookups[work_id] = lookup
+            lookup.add_done_callback(lambda _: self._work_lookups.pop(work_id, None))
+
+        # Shielded, so a cancelled caller doesn't cancel the lookup for the others
+        return await asyncio.shield(lookup)
+
+
+    async def _load_work(self, work_id: str) -> dict | None:
+        """
+        Loads a work missing from the in-process caches from Redis or Open Library
+        """
+
+        # A cached null marks a work that Open Library doesn't know
+        key = f"ol:w:{work_id}"
+        cached = await self._cache_get(key)
+        if cached is not None:
+            work_cache_stats["redis_hits"] += 1
+            book = orjson.loads(cached)
+            if book is None:
+                _missing_work_cache[work_id] = True
+            else:
+                _work_cache[work_id] = book
+            return book
+
+        work_cache_stats["misses"] += 1
+
         try:
             resp = await self.client.get(f"/works/{work_id}.json")
             resp.raise_for_status()
             work = resp.json()
+        except httpx.HTTPStatusError as e:
+            # Only a definite 404 is cached, transient errors are retried
+            if e.response.status_code == 404:
+                _missing_work_cache[work_id] = True
+                await self._cache_set(key, None, MISSING_WORK_CACHE_TTL_SECONDS)
+            return None
         except httpx.HTTPError:
             return None
 
@@ -137,6 +234,7 @@ class OpenLibraryService:
 
         # Authors
         authors = []
+        complete = True
         for a in work.get("authors", []):
             author_key = a.get("author", {}).get("key")
             if author_key:
@@ -146,6 +244,7 @@ class OpenLibraryService:
                     author = author_resp.json()
                     authors.append(author.get("name"))
                 except httpx.HTTPError:
+                    complete = False
                     continue
 
         # Publication year
@@ -163,10 +262,24 @@ class OpenLibraryService:
         if covers:
             cover_url = f"https://covers.openlibrary.org/b/id/{covers[0]}-L.jpg"
 
-        return {
+        book = {
             "work_olid": work_id,
             "title": title,
             "authors": authors or None,
             "year": year,
             "cover_url": cover_url,
-        }
\ No newline at end of file
+        }
+
+        # Don't keep a book whose author list is missing entries
+        if complete:
+            _work_cache[work_id] = book
+            await self._cache_set(key, book, WORK_CACHE_TTL_SECONDS)
+
+        return book
+
+
+    async def book_exists(self, work_id: str) -> bool:
+        """
+        Checks that a work OLID exists in Open Library
+        """
+        return await self.get_book_by_work(work_id) is not None
@@ -0,0 +1,63 @@
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+PAGE_CACHE_TTL_SECONDS = 60
+
+
+class PageCache:
+    """
+    Caches rendered JSON pages of per-user list endpoints in Redis.
+
+    All pages of one user and endpoint live in a single hash, so a write
+    drops them with one DEL instead of scanning keys.
+    Without Redis every lookup is a miss and writes are no-ops.
+    """
+
+    def __init__(self, redis: Redis | None, ttl: int = PAGE_CACHE_TTL_SECONDS):
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(namespace: str, user_id: int) -> str:
+        return f"{namespace}:{user_id}"
+
+    async def get(self, namespace: str, user_id: int, page: str) -> bytes | None:
+        """
+        Returns a cached page, a failing Redis is treated as a miss
+        """
+        if self.redis is None:
+            return None
+        try:
+            return await self.redis.hget(self._key(namespace, user_id), page)
+        except RedisError:
+            return None
+
+    async def set(self, namespace: str, user_id: int, page: str, content: bytes) -> None:
+        """
+        Stores a rendered page, the TTL applies to all pages of the user.
+
+        The TTL is set only when the hash is created (EXPIRE NX, Redis 7+), so pages
+        stored later don't extend the lifetime of the pages already cached.
+        """
+        if self.redis is None:
+            return
+        key = self._key(namespace, user_id)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(key, page, content)
+                pipe.expire(key, self.ttl, nx=True)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def invalidate(self, namespace: str, user_id: int) -> None:
+        """
+        Drops all cached pages of a user after a write
+        """
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(self._key(namespace, user_id))
+        except RedisError:
+            pass
@@ -3,19 +3,41 @@ from contextlib import asynccontextmanager
 import httpx
 import uvicorn
 from fastapi import FastAPI
+from redis.asyncio import Redis
+from sqlalchemy import text
 
+from app.config import REDIS_URL
+from app.database import async_engine
+from app.responses import ORJSONResponse
 from app.routers import auth, users, books, reviews, favorites, bookshelves, user_books
 from app.services.open_library import OpenLibraryService
+from app.services.page_cache import PageCache
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
-    http_client = httpx.AsyncClient(base_url="https://openlibrary.org")
-    app.state.open_library_service = OpenLibraryService(http_client)
+    # Open the first pooled connection now, so a bad DATABASE_URL fails the startup
+    # and the first request doesn't pay for the connection handshake
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+    # One pooled HTTP/2 client for every Open Library call of this worker
+    http_client = httpx.AsyncClient(
+        base_url="https://openlibrary.org",
+        http2=True,
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        timeout=5.0,
+    )
+    redis = Redis.from_url(REDIS_URL) if REDIS_URL else None
+    app.state.open_library_service = OpenLibraryService(http_client, redis)
+    app.state.page_cache = PageCache(redis)
     yield  # here FastAPI handles requests
     # shutdown
     await app.state.open_library_service.client.aclose()
+    if redis is not None:
+        await redis.aclose()
+    await async_engine.dispose()
 
 
 # Connecting lifespan to FastAPI
@@ -23,7 +45,8 @@ app = FastAPI(
     title="Library Hub",
     version="0.1.0",
     description=("Library Hub is a REST API for managing books, reviews, favorites and personal bookshelves."),
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 